@@ -1,2 +1,24 @@
-from .db import Database, Time
-from .report import make_pdf
+'''Attendance Validator.
+
+Submodules are only imported on first access, so that the command line tool
+does not pay for dependencies a subcommand never uses.
+'''
+from importlib import import_module
+
+_LAZY = {
+    'Database': 'db',
+    'Time': 'db',
+    'make_pdf': 'report',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    try:
+        module = _LAZY[name]
+    except KeyError:
+        raise AttributeError(
+            f'module {__name__!r} has no attribute {name!r}'
+        ) from None
+    return getattr(import_module(f'.{module}', __name__), name)
@@ -1,34 +1,34 @@
-'''Module for matching Sympla check-ins with UFSC's classes.'''
+'''Module for matching Sympla check-ins with UFSC's classes.
+
+Heavy dependencies (CAGR's network stack, openpyxl, report writing) are
+imported inside the subcommands that need them, to keep startup fast.
+'''
 from datetime import date as Date, time as Time
-from getpass import getpass
 from pathlib import Path
 from typing import Optional, Tuple
 
-from carl import command, REQUIRED
+from carl import command, REQUIRED, STOP
 from carl.carl import Command
-from cagrex import CAGR
-
-from .blocks import (
-    attendance_block_from_sheet,
-    block_for_timespan,
-    filter_class_schedule,
-    keep_only_students,
-    AttendanceBlock,
-    TimeBlock,
-)
+
+from .blocks import fit_attendances, TimeBlock
 from .db import Class, ClassNotFound, Database, Schedule, Students
-from .report import make_pdf
-from .sympla import Sheet
+from .timings import phase, record
 
 
 DEFAULT_DB = Path('./attor.db')
 
 
 def load_db_or_create(path: Path) -> Database:
-    try:
-        return Database.load(path)
-    except FileNotFoundError:
-        return Database(path=path)
+    with phase('db_load'):
+        try:
+            return Database.load(path)
+        except FileNotFoundError:
+            return Database(path=path)
+
+
+def save_db(database: Database):
+    with phase('db_save'):
+        database.save()
 
 
 def load_cagr_class(
@@ -39,6 +39,10 @@ def load_cagr_class(
     passwd: Optional[str] = None,
 ) -> Tuple[Class, Students]:
     '''Accesses CAGR and fetches class information.'''
+    from getpass import getpass
+
+    from cagrex import CAGR
+
     cagr = CAGR()
     subject = cagr.subject(subject_id, semester)
 
@@ -79,8 +83,17 @@ def load_cagr_class(
 
 
 @command
-def main(subcommand: Command = REQUIRED):
-    pass
+def main(
+    subcommand: Command = REQUIRED | STOP,
+    timings: Path = None,
+    profile: Path = None,
+):
+    '''Validates SECCOM attendances. With `--timings`, a JSON summary of wall
+    time and memory usage per phase is written to given file ("-" for stdout).
+    With `--profile`, a cProfile dump is written to given file.'''
+    _, subargs, _ = subcommand
+    with record(timings, profile):
+        Command.resume(subargs)
 
 
 @main.subcommand
@@ -103,7 +116,7 @@ def add_block(
         start=start_,
         end=end_,
     ))
-    database.save()
+    save_db(database)
 
 
 @main.subcommand
@@ -113,24 +126,20 @@ def import_attendances(
     db: Path = DEFAULT_DB,
 ):
     '''Imports a time block as a Sympla attendance XLSX file into database.'''
+    from .sympla import Sheet
+
     database = load_db_or_create(db)
-    sheet = Sheet.load(source)
-
-    attendances = attendance_block_from_sheet(sheet)
-    attendances = AttendanceBlock(
-        block=block_for_timespan(
-            sheet.date,
-            sheet.start,
-            sheet.end,
-            database.blocks,
-            threshold=Time(0, threshold, 0),
-        ),
-        attenders=attendances.attenders,
-    )
+    with phase('sheet_parse'):
+        sheet = Sheet.load(source)
+
+    with phase('matching'):
+        attendances = fit_attendances(
+            sheet, database.blocks, threshold=Time(0, threshold, 0)
+        )
     print(f'Fit into {attendances.block}', end='')
 
     database.add_attendances(attendances)
-    database.save()
+    save_db(database)
     print('Done.')
 
 
@@ -143,9 +152,13 @@ def validate(
     db: Path = DEFAULT_DB,
     ufscid: str = None,
     passwd: str = None,
+    min_minutes: int = 0,
 ):
     '''Validates attendances from a class and outputs into csv file. Class
-    members are cached into database.'''
+    members are cached into database. With `--min_minutes`, students who
+    checked in too late to be present that long in a slot are left out.'''
+    from .report import write_class_report
+
     database = load_db_or_create(db)
     try:
         print(f'Looking for cache...')
@@ -156,22 +169,73 @@ def validate(
         print(
             f'Class {subject_id}-{class_id} not cached. Loading from CAGR...'
         )
-        class_, students = load_cagr_class(
-            subject_id, class_id, semester, ufscid, passwd
-        )
+        with phase('cagr_fetch'):
+            class_, students = load_cagr_class(
+                subject_id, class_id, semester, ufscid, passwd
+            )
         database.add_students(students)
         database.add_class(class_)
 
-    database.save()
+    save_db(database)
 
-    attendances = filter_class_schedule(database.attendances, class_)
-    attendances = {
-        sched: keep_only_students(att, class_)
-        for sched, att in attendances.items()
-    }
+    write_class_report(
+        database.attendances, class_, students, output_dir, min_minutes
+    )
 
-    class_name = f'{class_.subject_id}-Turma-{class_.class_id}'
-    make_pdf(attendances, students, output_dir, class_name)
+
+@main.subcommand
+def query(student_id: str, min_minutes: int = 0, db: Path = DEFAULT_DB):
+    '''Shows which class slots a student is credited for. Only cached classes
+    and imported attendances are used (no CAGR access, no reports). Use the
+    same `--min_minutes` as `validate` for a matching answer.'''
+    from .report import make_sched_title
+
+    database = load_db_or_create(db)
+    name = database.students.get(student_id, 'unknown student')
+    print(f'{student_id}: {name}')
+
+    attended = database.attendances_of(student_id)
+    titles = ', '.join(att.block.title for att in attended)
+    print(f'Attended: {titles or "nothing"}')
+
+    credits = database.credits_for(student_id, min_minutes)
+    if not credits:
+        print('No credited slots.')
+    for credit in credits:
+        class_ = credit.class_
+        blocks = ', '.join(att.block.title for att in credit.blocks)
+        print(
+            f'- {class_.subject_id}-{class_.class_id} ({class_.semester}), '
+            f'{make_sched_title(credit.schedule)}: {blocks}'
+        )
+
+
+@main.subcommand
+def watch(
+    inbox: Path,
+    output_dir: Path,
+    threshold: int = 15,
+    interval: float = 5.0,
+    batch: int = 10,
+    min_minutes: int = 0,
+    db: Path = DEFAULT_DB,
+):
+    '''Watches a directory for new or changed Sympla XLSX files, importing
+    them and rewriting reports of affected (cached) classes. Runs until
+    interrupted.'''
+    from .inbox import Inbox, watch_inbox
+
+    database = load_db_or_create(db)
+    print(f'Watching {inbox} (Ctrl-C to stop)...')
+    watch_inbox(
+        database,
+        Inbox(inbox),
+        output_dir,
+        threshold=Time(0, threshold, 0),
+        interval=interval,
+        batch=batch,
+        min_minutes=min_minutes,
+    )
 
 
 if __name__ == '__main__':
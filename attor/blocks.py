@@ -2,22 +2,28 @@
 
 A TimeBlock is just a time span made merely for comparison/filtering purposes.
 A full attendance is represented by an AttendanceBlock, which is an aggregate
-of a TimeBlock and a list of attending students.
+of a TimeBlock, a list of attending students and when each of them checked in.
 '''
-from dataclasses import dataclass
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from enum import IntEnum
 from datetime import (
     date as Date,
+    datetime as DateTime,
     time as Time,
     timedelta as TimeDelta,
 )
 from pathlib import Path
-from typing import Dict, List, Set, Union
-
-from cagrex.cagr import Class, Weekday
+from typing import Dict, List, Set, TYPE_CHECKING, Union
 
-from .sympla import Sheet
 from .utils import advance_time, rewind_time
 
+if TYPE_CHECKING:
+    from cagrex.cagr import Class
+
+    from .sympla import Sheet, Ticket
+
 
 StudentID = str
 
@@ -26,6 +32,17 @@ class NoFittingBlock(Exception):
     pass
 
 
+class Weekday(IntEnum):
+    '''Same values as CAGR's weekdays, which compare (and hash) equal to these,
+    so loading schedules does not need CAGR's network stack.'''
+    MONDAY = 2
+    TUESDAY = 3
+    WEDNESDAY = 4
+    THURSDAY = 5
+    FRIDAY = 6
+    SATURDAY = 7
+
+
 @dataclass(unsafe_hash=True)
 class Schedule:
     weekday: Weekday
@@ -51,12 +68,12 @@ class AttendanceBlock:
     '''An attendance list in an specific TimeBlock.'''
     block: TimeBlock
     attenders: Set[StudentID]
+    checkins: Dict[StudentID, DateTime] = field(default_factory=dict)
 
 
 def fits_into(sched: Schedule, block: TimeBlock) -> bool:
     '''Checks if given weekday and time fits into given timeblock.'''
-    block_weekday = Weekday(block.date.isoweekday() + 1)
-    weekday_fits = block_weekday == sched.weekday
+    weekday_fits = block.date.isoweekday() + 1 == sched.weekday
 
     start = sched.time
     end = advance_time(sched.time, TimeDelta(minutes=sched.credits * 50))
@@ -96,6 +113,11 @@ def keep_only_students(
                 for student_id in block.attenders
                 if student_id in class_.students
             },
+            checkins={
+                student_id: checkin
+                for student_id, checkin in block.checkins.items()
+                if student_id in class_.students
+            },
         )
         for block in blocks
     ]
@@ -129,8 +151,29 @@ def block_for_timespan(
     )
 
 
+def fit_attendances(
+    sheet: Sheet,
+    blocks: List[TimeBlock],
+    threshold: Time = Time(0, 15, 0),
+) -> AttendanceBlock:
+    '''Returns sheet's attendances, fit into one of given blocks.'''
+    attendances = attendance_block_from_sheet(sheet)
+    return AttendanceBlock(
+        block=block_for_timespan(
+            sheet.date,
+            sheet.start,
+            sheet.end,
+            blocks,
+            threshold=threshold,
+        ),
+        attenders=attendances.attenders,
+        checkins=attendances.checkins,
+    )
+
+
 def attendance_block_from_sheet(sheet: Union[Sheet, Path]) -> AttendanceBlock:
     if isinstance(sheet, Path):
+        from .sympla import Sheet
         sheet = Sheet.load(sheet)
 
     return AttendanceBlock(
@@ -144,5 +187,24 @@ def attendance_block_from_sheet(sheet: Union[Sheet, Path]) -> AttendanceBlock:
             ticket.student_id
             for ticket in sheet.tickets
             if ticket.checked_in and ticket.student_id is not None
-        }
+        },
+        checkins=earliest_checkins(sheet.tickets),
     )
+
+
+def earliest_checkins(tickets: List[Ticket]) -> Dict[StudentID, DateTime]:
+    '''Returns when each student first checked in.'''
+    checkins: Dict[StudentID, DateTime] = {}
+    for ticket in tickets:
+        if (
+            not ticket.checked_in
+            or ticket.student_id is None
+            or ticket.checkin_date is None
+        ):
+            continue
+
+        stored = checkins.get(ticket.student_id)
+        if stored is None or ticket.checkin_date < stored:
+            checkins[ticket.student_id] = ticket.checkin_date
+
+    return checkins
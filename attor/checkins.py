@@ -0,0 +1,117 @@
+'''Partial-attendance validation from check-in timestamps.
+
+A student is taken as present from their check-in until the end of the block
+they checked into. Presence intervals are joined against the dated windows of
+a class's schedule with a sort-merge: check-ins and windows are sorted once and
+swept together, so each check-in only visits the windows it may overlap.
+'''
+from collections import defaultdict
+from datetime import datetime as DateTime
+from typing import Dict, Iterable, List, Tuple
+
+from .blocks import (
+    fits_into,
+    schedule_end,
+    AttendanceBlock,
+    Schedule,
+    StudentID,
+)
+
+
+Window = Tuple[DateTime, DateTime, Schedule]
+Overlaps = Dict[Schedule, Dict[StudentID, int]]
+
+
+def schedule_windows(
+    blocks: Iterable[AttendanceBlock],
+    schedule: List[Schedule],
+) -> List[Window]:
+    '''Returns the dated windows of each schedule slot fitting any of given
+    blocks, sorted by start.'''
+    windows = {}
+    for att in blocks:
+        date = att.block.date
+        for sched in schedule:
+            if fits_into(sched, att.block):
+                windows[(date, sched)] = (
+                    DateTime.combine(date, sched.time),
+                    DateTime.combine(date, schedule_end(sched)),
+                    sched,
+                )
+
+    return sorted(windows.values(), key=lambda window: window[0])
+
+
+def overlap_minutes(
+    blocks: Iterable[AttendanceBlock],
+    schedule: List[Schedule],
+) -> Overlaps:
+    '''Returns, for each schedule slot, how many minutes each checked-in
+    student was present during it.
+
+    Slots of a class are assumed not to overlap each other, so windows are
+    ordered by both start and end.
+    '''
+    blocks = list(blocks)
+    windows = schedule_windows(blocks, schedule)
+
+    checkins: List[Tuple[DateTime, DateTime, StudentID]] = []
+    for att in blocks:
+        leave = DateTime.combine(att.block.date, att.block.end)
+        checkins.extend(
+            (checkin, leave, student)
+            for student, checkin in att.checkins.items()
+        )
+    checkins.sort()
+
+    minutes: Overlaps = defaultdict(dict)
+    first = 0
+    for checkin, leave, student in checkins:
+        # Check-ins are sorted, so windows over by now are over for the rest.
+        while first < len(windows) and windows[first][1] <= checkin:
+            first += 1
+
+        i = first
+        while i < len(windows) and windows[i][0] < leave:
+            start, end, sched = windows[i]
+            present = min(end, leave) - max(start, checkin)
+            overlap = int(present.total_seconds() // 60)
+            if overlap > minutes[sched].get(student, 0):
+                minutes[sched][student] = overlap
+            i += 1
+
+    return minutes
+
+
+def keep_present_for(
+    atts: Dict[Schedule, List[AttendanceBlock]],
+    min_minutes: int,
+) -> Dict[Schedule, List[AttendanceBlock]]:
+    '''Drops attenders present for less than `min_minutes` of each slot.
+
+    Attenders with no check-in timestamp (e.g. imported before timestamps were
+    stored) are kept.
+    '''
+    blocks = {
+        att.block.title: att
+        for attlist in atts.values()
+        for att in attlist
+    }
+    minutes = overlap_minutes(blocks.values(), list(atts.keys()))
+
+    return {
+        sched: [
+            AttendanceBlock(
+                block=att.block,
+                attenders={
+                    student_id
+                    for student_id in att.attenders
+                    if student_id not in att.checkins
+                    or minutes[sched].get(student_id, 0) >= min_minutes
+                },
+                checkins=att.checkins,
+            )
+            for att in attlist
+        ]
+        for sched, attlist in atts.items()
+    }
@@ -1,16 +1,18 @@
 '''Management of attendance and classes databases.'''
 from __future__ import annotations
 
+from collections import defaultdict
 from dataclasses import asdict, dataclass, field
 from datetime import date as Date, time as Time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple
 import re
 
-from cagrex.cagr import Weekday
 import toml
 
-from .blocks import AttendanceBlock, Schedule, TimeBlock
+from .blocks import fits_into, AttendanceBlock, Schedule, TimeBlock, Weekday
+from .checkins import keep_present_for
+from .locking import atomic_write, locked, stamp, Stamp
 
 
 StudentID = str
@@ -38,6 +40,22 @@ class Class:
     schedule: List[Schedule]
 
 
+ClassKey = Tuple[str, str, str]
+
+
+def _class_key(class_: Class) -> ClassKey:
+    return (class_.subject_id, class_.class_id, class_.semester)
+
+
+@dataclass
+class Credit:
+    '''A class's schedule slot a student is credited for, and the attended
+    blocks that fit into it (holding only that student's attendance).'''
+    class_: Class
+    schedule: Schedule
+    blocks: List[AttendanceBlock]
+
+
 class InvalidWeekdayFormat(Exception):
     pass
 
@@ -57,8 +75,45 @@ class Database:
     classes: List[Class] = field(default_factory=list)
     students: Students = field(default_factory=dict)
 
+    def __post_init__(self):
+        # Inverted indexes from students to what they attended or enroll.
+        # Being plain attributes (not fields), they are never saved.
+        self._attendances_by_student: Dict[
+            StudentID, Dict[str, AttendanceBlock]
+        ] = defaultdict(dict)
+        self._classes_by_student: Dict[
+            StudentID, Dict[ClassKey, Class]
+        ] = defaultdict(dict)
+
+        for att in self.attendances:
+            self._index_attendances(att, att.attenders)
+        for class_ in self.classes:
+            self._index_class(class_)
+
+        # Version of the file this database was loaded from (or saved to).
+        self._stamp: Optional[Stamp] = None
+
+    def _index_attendances(
+        self,
+        att: AttendanceBlock,
+        attenders: Iterable[StudentID],
+    ):
+        for student_id in attenders:
+            self._attendances_by_student[student_id][att.block.title] = att
+
+    def _index_class(self, class_: Class):
+        for student_id in class_.students:
+            self._classes_by_student[student_id][_class_key(class_)] = class_
+
     @staticmethod
     def load(path: Path) -> Database:
+        with locked(path):
+            database = Database._read(path)
+            database._stamp = stamp(path)
+        return database
+
+    @staticmethod
+    def _read(path: Path) -> Database:
         with open(path) as f:
             data = toml.load(f)
 
@@ -68,7 +123,9 @@ class Database:
             attendances=[
                 AttendanceBlock(
                     block=TimeBlock(**block['block']),
-                    attenders=set(block['attenders'])
+                    attenders=set(block['attenders']),
+                    # Empty tables are not saved, nor by older versions.
+                    checkins=block.get('checkins', {}),
                 )
                 for block in data['attendances']
             ],
@@ -92,10 +149,48 @@ class Database:
         )
 
     def save(self):
-        _asdict = asdict(self)
-        del _asdict['path']
-        with open(self.path, 'w') as f:
-            toml.dump(_asdict, f)
+        '''Saves database. Changes saved by other processes since it was loaded
+        are merged first, so none of them is lost.'''
+        with locked(self.path, exclusive=True):
+            current = stamp(self.path)
+            if current is not None and current != self._stamp:
+                self.merge(Database._read(self.path))
+
+            _asdict = asdict(self)
+            del _asdict['path']
+            atomic_write(self.path, toml.dumps(_asdict))
+            self._stamp = stamp(self.path)
+
+    def refresh(self) -> bool:
+        '''Merges changes saved by other processes since this database was
+        loaded (or last saved/refreshed). Returns whether there were any.'''
+        with locked(self.path):
+            current = stamp(self.path)
+            if current is None or current == self._stamp:
+                return False
+
+            self.merge(Database._read(self.path))
+            self._stamp = current
+            return True
+
+    def merge(self, other: Database):
+        '''Adds everything from other database that is missing in this one.
+        Attendances of the same block are merged.'''
+        titles = {block.title for block in self.blocks}
+        for block in other.blocks:
+            if block.title not in titles:
+                self.blocks.append(block)
+
+        for att in other.attendances:
+            self.add_attendances(att)
+
+        classes = {_class_key(class_) for class_ in self.classes}
+        for class_ in other.classes:
+            if _class_key(class_) not in classes:
+                self.add_class(class_)
+
+        for id_, name in other.students.items():
+            self.students.setdefault(id_, name)
 
     def add_attendances(self, att: AttendanceBlock):
         dups = [
@@ -107,8 +202,14 @@ class Database:
         if dups:
             dup = dups[0]
             dup.attenders.update(att.attenders)
+            for student_id, checkin in att.checkins.items():
+                stored = dup.checkins.get(student_id)
+                if stored is None or checkin < stored:
+                    dup.checkins[student_id] = checkin
+            self._index_attendances(dup, att.attenders)
         else:
             self.attendances.append(att)
+            self._index_attendances(att, att.attenders)
 
     def add_students(self, students: Students):
         for id_, name in students.items():
@@ -121,6 +222,7 @@ class Database:
             )
 
         self.classes.append(class_)
+        self._index_class(class_)
 
     def add_block(self, block: TimeBlock):
         if any(block.title == stored.title for stored in self.blocks):
@@ -155,6 +257,52 @@ class Database:
             f'No class {subject_id}-{class_id} in {semester} (Database)'
         )
 
+    def attendances_of(self, student_id: StudentID) -> List[AttendanceBlock]:
+        '''Returns every attendance block a student attended.'''
+        return list(self._attendances_by_student.get(student_id, {}).values())
+
+    def classes_of(self, student_id: StudentID) -> List[Class]:
+        '''Returns every cached class a student is enrolled in.'''
+        return list(self._classes_by_student.get(student_id, {}).values())
+
+    def credits_for(
+        self,
+        student_id: StudentID,
+        min_minutes: int = 0,
+    ) -> List[Credit]:
+        '''Returns which schedule slots of cached classes a student is
+        credited for, just as `validate` with the same `min_minutes` would
+        report them.'''
+        attended = [
+            AttendanceBlock(
+                block=att.block,
+                attenders={student_id},
+                checkins={
+                    id_: checkin
+                    for id_, checkin in att.checkins.items()
+                    if id_ == student_id
+                },
+            )
+            for att in self.attendances_of(student_id)
+        ]
+
+        credits = []
+        for class_ in self.classes_of(student_id):
+            atts = {
+                sched: [
+                    att for att in attended if fits_into(sched, att.block)
+                ]
+                for sched in class_.schedule
+            }
+            if min_minutes:
+                atts = keep_present_for(atts, min_minutes)
+
+            for sched, attlist in atts.items():
+                blocks = [att for att in attlist if att.attenders]
+                if blocks:
+                    credits.append(Credit(class_, sched, blocks))
+        return credits
+
 
 if __name__ == '__main__':
     attendances = [
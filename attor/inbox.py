@@ -0,0 +1,190 @@
+'''Watch mode: incremental import of Sympla exports dropped into a directory.
+
+The inbox is polled (no extra dependencies needed) and only new or modified
+XLSX files are imported. Reports are rewritten only for classes whose schedule
+fits into a block that received new attendances, and the database is saved in
+batches rather than after every file.
+'''
+from dataclasses import dataclass, field
+from datetime import time as Time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+from zipfile import BadZipFile
+import time
+
+from openpyxl.utils.exceptions import InvalidFileException
+
+from .blocks import fit_attendances, fits_into, NoFittingBlock, TimeBlock
+from .db import Class, Database
+from .report import write_class_report
+from .sympla import Sheet
+from .timings import phase
+
+
+Stamp = Tuple[int, int]
+
+# Errors from reading an unfinished or malformed export.
+SHEET_ERRORS = (
+    AttributeError,
+    BadZipFile,
+    IndexError,
+    InvalidFileException,
+    KeyError,
+    OSError,
+    TypeError,
+    ValueError,
+)
+
+
+@dataclass
+class Inbox:
+    '''A directory of Sympla exports, remembering which files were seen.'''
+    path: Path
+    seen: Dict[Path, Stamp] = field(default_factory=dict)
+
+    def poll(self) -> List[Path]:
+        '''Returns XLSX files that are new or changed since last poll.'''
+        changed = []
+        for path in sorted(self.path.rglob('*.xlsx')):
+            # Lock files left by spreadsheet editors.
+            if path.name.startswith('~$'):
+                continue
+
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if self.seen.get(path) != stamp:
+                self.seen[path] = stamp
+                changed.append(path)
+
+        return changed
+
+    def forget(self, path: Path):
+        '''Makes path be returned by next poll, even if unchanged.'''
+        self.seen.pop(path, None)
+
+
+def classes_for_block(classes: List[Class], block: TimeBlock) -> List[Class]:
+    '''Returns classes with any schedule fitting into given block.'''
+    return [
+        class_
+        for class_ in classes
+        if any(fits_into(sched, block) for sched in class_.schedule)
+    ]
+
+
+def import_file(
+    database: Database,
+    path: Path,
+    threshold: Time,
+) -> List[TimeBlock]:
+    '''Imports a Sympla export into database, returning affected blocks.
+
+    Raises NoFittingBlock if the export fits into none of database's blocks.
+    '''
+    try:
+        with phase('sheet_parse'):
+            sheet = Sheet.load(path)
+    except SHEET_ERRORS as e:
+        # Files may be caught mid-copy; they are retried once changed again.
+        print(f'Skipping {path}: {e}')
+        return []
+
+    with phase('matching'):
+        attendances = fit_attendances(sheet, database.blocks, threshold)
+
+    print(f'{path}: fit into {attendances.block.title}')
+    database.add_attendances(attendances)
+    return [attendances.block]
+
+
+def update_reports(
+    database: Database,
+    blocks: List[TimeBlock],
+    output_dir: Path,
+    min_minutes: int = 0,
+):
+    '''Rewrites reports of cached classes affected by given blocks.'''
+    affected: Dict[Tuple[str, str, str], Class] = {}
+    for block in blocks:
+        for class_ in classes_for_block(database.classes, block):
+            key = (class_.subject_id, class_.class_id, class_.semester)
+            affected[key] = class_
+
+    for class_ in affected.values():
+        write_class_report(
+            database.attendances,
+            class_,
+            database.students_with_ids(class_.students),
+            output_dir,
+            min_minutes,
+        )
+
+
+def import_changed(
+    database: Database,
+    inbox: Inbox,
+    unfit: Set[Path],
+    threshold: Time = Time(0, 15, 0),
+) -> List[TimeBlock]:
+    '''Imports new or changed files from inbox, returning affected blocks.
+
+    Files fitting no block are kept in `unfit`, and retried once changes saved
+    by other processes (such as a new block) are merged into database.
+    '''
+    if unfit and database.refresh():
+        for path in unfit:
+            inbox.forget(path)
+        unfit.clear()
+
+    blocks: List[TimeBlock] = []
+    for path in inbox.poll():
+        unfit.discard(path)
+        try:
+            blocks.extend(import_file(database, path, threshold))
+        except NoFittingBlock as e:
+            print(f'{path}: {e} Retrying once blocks change.')
+            unfit.add(path)
+    return blocks
+
+
+def watch_inbox(
+    database: Database,
+    inbox: Inbox,
+    output_dir: Path,
+    threshold: Time = Time(0, 15, 0),
+    interval: float = 5.0,
+    batch: int = 10,
+    min_minutes: int = 0,
+):
+    '''Imports files from inbox until interrupted.
+
+    Database is saved once `batch` files were imported, or as soon as the
+    inbox goes quiet with unsaved changes, and before exiting.
+    '''
+    pending = 0
+    unfit: Set[Path] = set()
+    try:
+        while True:
+            blocks = import_changed(database, inbox, unfit, threshold)
+
+            if blocks:
+                update_reports(database, blocks, output_dir, min_minutes)
+                pending += len(blocks)
+
+            if pending and (pending >= batch or not blocks):
+                with phase('db_save'):
+                    database.save()
+                print(f'Saved {pending} import(s) into {database.path}.')
+                pending = 0
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if pending:
+            database.save()
+            print(f'Saved {pending} import(s) into {database.path}.')
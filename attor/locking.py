@@ -0,0 +1,69 @@
+'''Cross-process locking and atomic writes of database files.
+
+Locks are taken on a sidecar "<file>.lock" rather than on the file itself,
+since writes replace the file (write into a temporary file, then rename it
+over the old one). Locks rely on `flock`; where it is missing (e.g. Windows),
+locking is skipped and only writes stay atomic.
+'''
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # type: ignore
+
+
+Stamp = Tuple[int, int, int]
+
+
+@contextmanager
+def locked(path: Path, exclusive: bool = False) -> Iterator[None]:
+    '''Holds a shared (readers) or exclusive (writer) lock over path. Does
+    nothing where `flock` is not available.'''
+    if fcntl is None:
+        yield
+        return
+
+    with open(path.with_name(path.name + '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def stamp(path: Path) -> Optional[Stamp]:
+    '''Identifies a version of a file, or None if it does not exist. Any
+    write through `atomic_write` results in a different stamp.'''
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def atomic_write(path: Path, content: str):
+    '''Writes content into path, so readers see either the old or the new
+    content, never a partially written file.'''
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
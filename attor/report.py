@@ -6,8 +6,17 @@ from typing import Dict, List, Optional
 import csv
 import operator
 
-from .blocks import schedule_end, AttendanceBlock, Schedule, TimeBlock
-from .db import Students
+from .blocks import (
+    filter_class_schedule,
+    keep_only_students,
+    schedule_end,
+    AttendanceBlock,
+    Schedule,
+    TimeBlock,
+)
+from .checkins import keep_present_for
+from .db import Class, Students
+from .timings import phase
 
 WEEK = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta']
 
@@ -93,3 +102,26 @@ def make_pdf(
         ''').strip())
         for student in att.attenders:
             print(f'    {student}: {students[student]}')
+
+
+def write_class_report(
+    attendances: List[AttendanceBlock],
+    class_: Class,
+    students: Students,
+    output_dir: Path,
+    min_minutes: int = 0,
+):
+    '''Writes attendance reports of given class's schedule. Attenders present
+    for less than `min_minutes` of a slot are left out of its report.'''
+    with phase('matching'):
+        atts = filter_class_schedule(attendances, class_)
+        atts = {
+            sched: keep_only_students(att, class_)
+            for sched, att in atts.items()
+        }
+        if min_minutes:
+            atts = keep_present_for(atts, min_minutes)
+
+    class_name = f'{class_.subject_id}-Turma-{class_.class_id}'
+    with phase('report_write'):
+        make_pdf(atts, students, output_dir, class_name)
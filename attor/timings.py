@@ -0,0 +1,107 @@
+'''Per-phase timing and allocation instrumentation.
+
+Phases are marked with the `phase` context manager, which costs nothing unless
+recording was enabled through `record` (that is, `--timings`/`--profile` on the
+command line).
+'''
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional
+import json
+import time
+import tracemalloc
+
+
+@dataclass
+class PhaseTiming:
+    '''Wall time (in seconds) of a phase, and traced memory (in bytes) it
+    retained (net change, negative if it freed more than it kept) and peaked
+    at.'''
+    name: str
+    wall: float
+    retained: int
+    peak: int
+
+
+@dataclass
+class Timings:
+    phases: List[PhaseTiming] = field(default_factory=list)
+    total: float = 0.0
+
+    def dump(self, path: Path):
+        '''Writes timings as JSON into path (or stdout, if path is "-").'''
+        summary = json.dumps(asdict(self), indent=2)
+        if str(path) == '-':
+            print(summary)
+        else:
+            with open(path, 'w') as f:
+                f.write(summary)
+
+
+_current: Optional[Timings] = None
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    '''Records wall time and memory usage during a phase.'''
+    if _current is None:
+        yield
+        return
+
+    # Only available from Python 3.9 on. Before that, peak is process-wide.
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        after, peak = tracemalloc.get_traced_memory()
+        _current.phases.append(PhaseTiming(
+            name=name,
+            wall=wall,
+            retained=after - before,
+            peak=peak,
+        ))
+
+
+@contextmanager
+def record(
+    timings: Optional[Path] = None,
+    profile: Optional[Path] = None,
+) -> Iterator[None]:
+    '''Enables phase recording (dumped as JSON into `timings`) and cProfile
+    (dumped as pstats into `profile`) while the context is active.'''
+    global _current
+
+    if timings is None and profile is None:
+        yield
+        return
+
+    # Tracing allocations is expensive and would distort a cProfile dump, so
+    # it only happens when timings were asked for.
+    if timings is not None:
+        _current = Timings()
+        tracemalloc.start()
+    profiler = None
+    if profile:
+        from cProfile import Profile
+        profiler = Profile()
+    start = time.perf_counter()
+
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(str(profile))
+
+        if timings is not None and _current is not None:
+            _current.total = time.perf_counter() - start
+            tracemalloc.stop()
+            _current.dump(timings)
+            _current = None
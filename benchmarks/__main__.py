@@ -0,0 +1,201 @@
+'''Benchmark suite for attor's hot paths.
+
+Run from repository root:
+
+    $ python -m benchmarks --output bench.json
+    $ python -m benchmarks --output new.json --baseline bench.json
+
+Results are stored as JSON so runs from different commits can be compared.
+'''
+from contextlib import redirect_stdout
+from datetime import datetime as DateTime
+from pathlib import Path
+from random import Random
+from statistics import mean, median
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, Optional
+import io
+import json
+import platform
+import subprocess
+import time
+
+from carl import command
+
+from attor.blocks import (
+    block_for_timespan,
+    filter_class_schedule,
+    keep_only_students,
+    NoFittingBlock,
+)
+from attor.checkins import keep_present_for
+from attor.db import Database
+from attor.report import make_pdf
+from attor.sympla import Sheet
+
+from .generators import make_database, sheet_timespan, write_sympla_sheet
+
+
+Result = Dict[str, float]
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Result:
+    '''Runs `fn` `repeat` times, returning timing statistics in seconds.'''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            fn()
+        times.append(time.perf_counter() - start)
+
+    return {
+        'repeat': repeat,
+        'min': min(times),
+        'median': median(times),
+        'mean': mean(times),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def match_timespans(spans, blocks):
+    for start, end in spans:
+        try:
+            block_for_timespan(start.date(), start.time(), end.time(), blocks)
+        except NoFittingBlock:
+            pass
+
+
+def run_benchmarks(
+    workdir: Path,
+    scale: int,
+    repeat: int,
+    seed: int,
+) -> Dict[str, Result]:
+    rng = Random(seed)
+    results: Dict[str, Result] = {}
+
+    sheet_path = write_sympla_sheet(
+        rng, workdir / 'sympla.xlsx', tickets=10000 * scale
+    )
+    results['Sheet.load'] = measure(lambda: Sheet.load(sheet_path), repeat)
+
+    database = make_database(
+        rng,
+        workdir / 'attor.db',
+        blocks=2000 * scale,
+        classes=300 * scale,
+        students=5000 * scale,
+    )
+    results['Database.save'] = measure(database.save, repeat)
+    results['Database.load'] = measure(
+        lambda: Database.load(database.path), repeat
+    )
+
+    spans = [sheet_timespan(rng) for _ in range(100)]
+    results['block_for_timespan'] = measure(
+        lambda: match_timespans(spans, database.blocks), repeat
+    )
+
+    results['filter_class_schedule'] = measure(
+        lambda: [
+            filter_class_schedule(database.attendances, class_)
+            for class_ in database.classes
+        ],
+        repeat,
+    )
+
+    filtered = [
+        (class_, filter_class_schedule(database.attendances, class_))
+        for class_ in database.classes
+    ]
+    results['keep_only_students'] = measure(
+        lambda: [
+            {
+                sched: keep_only_students(att, class_)
+                for sched, att in attendances.items()
+            }
+            for class_, attendances in filtered
+        ],
+        repeat,
+    )
+
+    # Over all check-ins of every block, not only those of class members.
+    results['keep_present_for'] = measure(
+        lambda: [
+            keep_present_for(attendances, 30)
+            for _, attendances in filtered[:10]
+        ],
+        repeat,
+    )
+
+    class_, attendances = max(
+        filtered, key=lambda f: sum(len(atts) for atts in f[1].values())
+    )
+    attendances = {
+        sched: keep_only_students(att, class_)
+        for sched, att in attendances.items()
+    }
+    students = database.students_with_ids(class_.students)
+    results['make_pdf'] = measure(
+        lambda: make_pdf(
+            attendances, students, workdir / 'reports', 'Benchmark'
+        ),
+        repeat,
+    )
+
+    return results
+
+
+def print_comparison(results: Dict[str, Result], baseline: Path):
+    with open(baseline) as f:
+        previous = json.load(f)['results']
+
+    for name, result in results.items():
+        if name not in previous:
+            continue
+        ratio = result['median'] / previous[name]['median']
+        print(f'{name}: {ratio:.2f}x baseline')
+
+
+@command
+def main(
+    output: Path = Path('bench.json'),
+    baseline: Path = None,
+    scale: int = 1,
+    repeat: int = 5,
+    seed: int = 0,
+):
+    '''Runs benchmarks over synthetic data and saves results as JSON.'''
+    with TemporaryDirectory() as tmp:
+        results = run_benchmarks(Path(tmp), scale, repeat, seed)
+
+    for name, result in results.items():
+        print(f'{name}: {result["median"]:.4f}s (median of {repeat})')
+
+    with open(output, 'w') as f:
+        json.dump({
+            'revision': git_revision(),
+            'date': DateTime.now().isoformat(),
+            'python': platform.python_version(),
+            'scale': scale,
+            'seed': seed,
+            'results': results,
+        }, f, indent=2)
+
+    if baseline:
+        print_comparison(results, baseline)
+
+
+if __name__ == '__main__':
+    main.run()
@@ -0,0 +1,201 @@
+'''Generators of synthetic data for benchmarking.
+
+Every generator takes a `random.Random` instance so that runs are reproducible
+across commits (same seed, same data).
+'''
+from datetime import (
+    date as Date,
+    datetime as DateTime,
+    time as Time,
+    timedelta as TimeDelta,
+)
+from pathlib import Path
+from random import Random
+from typing import List, Tuple
+
+from openpyxl import Workbook
+
+from attor.blocks import AttendanceBlock, Schedule, TimeBlock, Weekday
+from attor.db import Class, Database, Students
+
+
+FIRST_DAY = Date(2019, 9, 30)
+DAYS = 5
+SLOTS = [
+    (Time(7, 30), Time(9, 10)),
+    (Time(8, 20), Time(10, 0)),
+    (Time(10, 10), Time(12, 0)),
+    (Time(13, 30), Time(15, 20)),
+    (Time(15, 10), Time(17, 30)),
+    (Time(18, 30), Time(20, 20)),
+    (Time(20, 20), Time(22, 0)),
+]
+SHEET_HEADER = [
+    'Nº', 'Código', 'Nome', 'Sobrenome', 'Tipo de ingresso', 'Valor',
+    'Data da compra', 'Pedido', 'E-mail', 'Estado', 'Check-in',
+    'Data do check-in', 'Código de desconto', 'Forma de pagamento', 'PDV',
+    'CPF', 'Matrícula', 'Disciplinas',
+]
+
+
+def make_student_ids(rng: Random, count: int) -> List[str]:
+    return [str(n) for n in rng.sample(range(10000000, 20000000), count)]
+
+
+def make_students(rng: Random, student_ids: List[str]) -> Students:
+    return {
+        id_: f'Student {rng.randrange(1_000_000)}'
+        for id_ in student_ids
+    }
+
+
+def make_timeblocks(rng: Random, count: int) -> List[TimeBlock]:
+    '''Builds `count` uniquely titled blocks spread over SECCOM's week.'''
+    blocks = []
+    for i in range(count):
+        start, end = SLOTS[i % len(SLOTS)]
+        blocks.append(TimeBlock(
+            title=f'Bloco-{i}',
+            date=FIRST_DAY + TimeDelta(days=rng.randrange(DAYS)),
+            start=start,
+            end=end,
+        ))
+    return blocks
+
+
+def make_attendances(
+    rng: Random,
+    blocks: List[TimeBlock],
+    student_ids: List[str],
+    attenders_per_block: int,
+) -> List[AttendanceBlock]:
+    attendances = []
+    for block in blocks:
+        attenders = rng.sample(
+            student_ids,
+            min(attenders_per_block, len(student_ids)),
+        )
+        start = DateTime.combine(block.date, block.start)
+        attendances.append(AttendanceBlock(
+            block=block,
+            attenders=set(attenders),
+            checkins={
+                student_id: start + TimeDelta(minutes=rng.randrange(-15, 90))
+                for student_id in attenders
+            },
+        ))
+    return attendances
+
+
+def make_classes(
+    rng: Random,
+    count: int,
+    student_ids: List[str],
+    students_per_class: int,
+    semester: str = '20192',
+) -> List[Class]:
+    classes = []
+    for i in range(count):
+        schedule = []
+        for day in rng.sample(range(DAYS), 2):
+            start, _ = rng.choice(SLOTS)
+            date = FIRST_DAY + TimeDelta(days=day)
+            weekday = Weekday(date.isoweekday() + 1)
+            schedule.append(Schedule(weekday, start, rng.choice([2, 3])))
+
+        classes.append(Class(
+            subject_id=f'INE{5400 + i // 10}',
+            class_id=f'0{i % 10}208A',
+            semester=semester,
+            students=rng.sample(
+                student_ids,
+                min(students_per_class, len(student_ids)),
+            ),
+            schedule=schedule,
+        ))
+    return classes
+
+
+def make_database(
+    rng: Random,
+    path: Path,
+    blocks: int = 2000,
+    classes: int = 300,
+    students: int = 5000,
+    attenders_per_block: int = 200,
+    students_per_class: int = 40,
+) -> Database:
+    '''Builds an in-memory database with thousands of blocks and attendances
+    and hundreds of class rosters.'''
+    student_ids = make_student_ids(rng, students)
+    timeblocks = make_timeblocks(rng, blocks)
+
+    return Database(
+        path=path,
+        blocks=timeblocks,
+        attendances=make_attendances(
+            rng, timeblocks, student_ids, attenders_per_block
+        ),
+        classes=make_classes(
+            rng, classes, student_ids, students_per_class
+        ),
+        students=make_students(rng, student_ids),
+    )
+
+
+def sheet_timespan(rng: Random) -> Tuple[DateTime, DateTime]:
+    start, end = rng.choice(SLOTS)
+    date = FIRST_DAY + TimeDelta(days=rng.randrange(DAYS))
+    return DateTime.combine(date, start), DateTime.combine(date, end)
+
+
+def write_sympla_sheet(
+    rng: Random,
+    path: Path,
+    tickets: int = 10000,
+    title: str = 'Bloco',
+    checkin_ratio: float = 0.7,
+) -> Path:
+    '''Writes a Sympla-like check-in XLSX export with `tickets` rows.
+
+    The layout mirrors what `attor.sympla.Sheet.load` expects: event start and
+    end at A6 and A7, and tickets from the 9th row onwards.
+    '''
+    start, end = sheet_timespan(rng)
+    student_ids = make_student_ids(rng, tickets)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title)
+
+    for _ in range(5):
+        ws.append([])
+    ws.append([start])
+    ws.append([end])
+    ws.append(SHEET_HEADER)
+
+    for n, student_id in enumerate(student_ids, start=1):
+        checked_in = rng.random() < checkin_ratio
+        checkin_date = start + TimeDelta(minutes=rng.randrange(90))
+        ws.append([
+            n,
+            f'T{n:08d}',
+            f'Name{n}',
+            f'Surname{n}',
+            'Estudante',
+            '0,00',
+            '2019-09-01 12:00:00',
+            f'P{n:08d}',
+            f'student{n}@example.com',
+            'Aprovado',
+            'Sim' if checked_in else 'Não',
+            checkin_date.isoformat(sep=' ') if checked_in else None,
+            None,
+            'Grátis',
+            'Online',
+            f'{rng.randrange(10 ** 11):011d}',
+            int(student_id),
+            'INE5401-01208A,INE5402-01208B',
+        ])
+
+    wb.save(path)
+    return path
@@ -1,5 +1,20 @@
+from datetime import date, datetime, time
 from pathlib import Path
-from attor.blocks import attendance_block_from_sheet
+import json
+import pstats
+import tracemalloc
+
+from attor.blocks import (
+    attendance_block_from_sheet,
+    AttendanceBlock,
+    Schedule,
+    TimeBlock,
+    Weekday,
+)
+from attor.checkins import keep_present_for, overlap_minutes
+from attor.db import Class, Database
+from attor.inbox import import_changed, update_reports, Inbox
+from attor import timings
 
 SEMESTER = '20192'
 EXPECTED_NAMES = [
@@ -57,3 +72,237 @@ def test_retrieve_from_xlsx():
     )
 
     assert names == EXPECTED_NAMES
+
+
+def test_student_index():
+    monday = TimeBlock('Bloco-1-Seg', date(2019, 9, 30), time(13, 30),
+                       time(15, 20))
+    tuesday = TimeBlock('Bloco-1-Ter', date(2019, 10, 1), time(13, 30),
+                        time(15, 20))
+    db = Database(
+        path=Path('attor.db'),
+        attendances=[AttendanceBlock(monday, {'1', '2'})],
+    )
+    db.add_attendances(AttendanceBlock(monday, {'3'}))
+    db.add_attendances(AttendanceBlock(tuesday, {'1'}))
+    db.add_class(Class(
+        subject_id='INE5401',
+        class_id='01208A',
+        semester=SEMESTER,
+        students=['1', '3'],
+        schedule=[Schedule(Weekday(2), time(13, 30), 2)],
+    ))
+
+    assert [a.block for a in db.attendances_of('1')] == [monday, tuesday]
+    assert [a.block for a in db.attendances_of('3')] == [monday]
+    assert [c.class_id for c in db.classes_of('3')] == ['01208A']
+
+    credits = db.credits_for('1')
+    assert len(credits) == 1
+    assert [a.block for a in credits[0].blocks] == [monday]
+    assert db.credits_for('2') == []
+
+
+def test_credits_for_min_minutes():
+    monday = TimeBlock('Bloco-1-Seg', date(2019, 9, 30), time(13, 30),
+                       time(15, 20))
+    db = Database(
+        path=Path('attor.db'),
+        attendances=[AttendanceBlock(
+            monday,
+            {'early', 'late', 'legacy'},
+            checkins={
+                'early': datetime(2019, 9, 30, 13, 25),
+                'late': datetime(2019, 9, 30, 14, 50),
+            },
+        )],
+    )
+    db.add_class(Class(
+        subject_id='INE5401',
+        class_id='01208A',
+        semester=SEMESTER,
+        students=['early', 'late', 'legacy'],
+        schedule=[Schedule(Weekday.MONDAY, time(13, 30), 2)],
+    ))
+
+    for student_id in ['early', 'late', 'legacy']:
+        assert len(db.credits_for(student_id)) == 1
+    assert len(db.credits_for('early', min_minutes=30)) == 1
+    assert db.credits_for('late', min_minutes=30) == []
+    assert len(db.credits_for('legacy', min_minutes=30)) == 1
+
+
+def test_checkin_overlap():
+    block = TimeBlock('Bloco-1-Seg', date(2019, 9, 30), time(13, 30),
+                      time(15, 20))
+    first = Schedule(Weekday(2), time(13, 30), 1)
+    second = Schedule(Weekday(2), time(14, 20), 2)
+    att = AttendanceBlock(
+        block,
+        {'early', 'late', 'gone', 'legacy'},
+        checkins={
+            'early': datetime(2019, 9, 30, 13, 0),
+            'late': datetime(2019, 9, 30, 14, 40),
+            'gone': datetime(2019, 9, 30, 15, 30),
+        },
+    )
+
+    minutes = overlap_minutes([att], [first, second])
+    assert minutes[first] == {'early': 50}
+    assert minutes[second] == {'early': 60, 'late': 40}
+
+    kept = keep_present_for({first: [att], second: [att]}, 45)
+    assert kept[first][0].attenders == {'early', 'legacy'}
+    assert kept[second][0].attenders == {'early', 'legacy'}
+
+
+def test_concurrent_saves_merge(tmpdir):
+    path = Path(str(tmpdir)) / 'attor.db'
+    monday = TimeBlock('Bloco-1-Seg', date(2019, 9, 30), time(13, 30),
+                       time(15, 20))
+    tuesday = TimeBlock('Bloco-1-Ter', date(2019, 10, 1), time(13, 30),
+                        time(15, 20))
+    Database(path=path, blocks=[monday, tuesday]).save()
+
+    first = Database.load(path)
+    second = Database.load(path)
+
+    first.add_attendances(AttendanceBlock(monday, {'1'}))
+    first.add_students({'1': 'First'})
+    first.save()
+
+    second.add_attendances(AttendanceBlock(monday, {'2'}))
+    second.add_attendances(AttendanceBlock(tuesday, {'2'}))
+    second.add_students({'2': 'Second'})
+    second.save()
+
+    db = Database.load(path)
+    assert [b.title for b in db.blocks] == ['Bloco-1-Seg', 'Bloco-1-Ter']
+    assert {a.block.title: a.attenders for a in db.attendances} == {
+        'Bloco-1-Seg': {'1', '2'},
+        'Bloco-1-Ter': {'2'},
+    }
+    assert db.students == {'1': 'First', '2': 'Second'}
+
+
+def test_save_after_file_removed(tmpdir):
+    path = Path(str(tmpdir)) / 'attor.db'
+    block = TimeBlock('Bloco-1-Seg', date(2019, 9, 30), time(13, 30),
+                      time(15, 20))
+    Database(path=path).save()
+
+    db = Database.load(path)
+    db.add_block(block)
+    path.unlink()
+    db.save()
+
+    assert Database.load(path).blocks == [block]
+
+
+def test_inbox_poll(tmpdir):
+    inbox = Inbox(Path(str(tmpdir)))
+    sheet = inbox.path / 'Bloco1.xlsx'
+    sheet.write_bytes(b'partial')
+    (inbox.path / '~$Bloco1.xlsx').write_bytes(b'')
+    (inbox.path / 'notes.txt').write_bytes(b'')
+
+    assert inbox.poll() == [sheet]
+    assert inbox.poll() == []
+
+    sheet.write_bytes(b'complete')
+    assert inbox.poll() == [sheet]
+
+    inbox.forget(sheet)
+    assert inbox.poll() == [sheet]
+
+
+def test_update_reports(tmpdir):
+    output_dir = Path(str(tmpdir)) / 'out'
+    monday = TimeBlock('Bloco-1-Seg', date(2019, 9, 30), time(13, 30),
+                       time(15, 20))
+    db = Database(
+        path=Path(str(tmpdir)) / 'attor.db',
+        attendances=[AttendanceBlock(monday, {'1'})],
+        students={'1': 'First'},
+    )
+    for class_id, weekday in [('01208A', Weekday.MONDAY),
+                              ('01208B', Weekday.TUESDAY)]:
+        db.add_class(Class(
+            subject_id='INE5401',
+            class_id=class_id,
+            semester=SEMESTER,
+            students=['1'],
+            schedule=[Schedule(weekday, time(13, 30), 2)],
+        ))
+
+    update_reports(db, [monday], output_dir)
+
+    assert [p.name for p in output_dir.iterdir()] == [
+        'INE5401-Turma-01208A-Segunda-13h30.csv',
+    ]
+
+
+def test_unfit_sheet_retried_once_blocks_change(tmpdir, capsys):
+    inbox = Inbox(Path(str(tmpdir)) / 'inbox')
+    inbox.path.mkdir()
+    sheet = inbox.path / 'Matutino.xlsx'
+    sheet.write_bytes(
+        Path('tests/assets/Presenças/Minicursos/0930/Matutino.xlsx')
+        .read_bytes()
+    )
+    path = Path(str(tmpdir)) / 'attor.db'
+    Database(path=path).save()
+
+    db = Database.load(path)
+    unfit = set()
+    assert import_changed(db, inbox, unfit) == []
+    assert unfit == {sheet}
+    capsys.readouterr()
+
+    # Nothing changed, so the sheet is not parsed again.
+    assert import_changed(db, inbox, unfit) == []
+    assert capsys.readouterr().out == ''
+
+    other = Database.load(path)
+    block = TimeBlock('Matutino', date(2019, 9, 30), time(10, 10),
+                      time(12, 0))
+    other.add_block(block)
+    other.save()
+
+    assert import_changed(db, inbox, unfit) == [block]
+    assert unfit == set()
+    assert db.attendances[0].attenders
+
+
+def test_phase_outside_record():
+    with timings.phase('db_load'):
+        assert not tracemalloc.is_tracing()
+    assert timings._current is None
+
+
+def test_record_timings(tmpdir):
+    path = Path(str(tmpdir)) / 'timings.json'
+    with timings.record(timings=path):
+        with timings.phase('db_load'):
+            [0] * 1000
+        with timings.phase('db_save'):
+            pass
+
+    summary = json.loads(path.read_text())
+    assert [p['name'] for p in summary['phases']] == ['db_load', 'db_save']
+    assert summary['total'] > 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_record_profile_only(tmpdir, monkeypatch):
+    def start(*args):
+        raise AssertionError('tracemalloc started')
+
+    monkeypatch.setattr(tracemalloc, 'start', start)
+
+    path = Path(str(tmpdir)) / 'attor.prof'
+    with timings.record(profile=path):
+        with timings.phase('db_load'):
+            sorted(range(1000))
+
+    assert pstats.Stats(str(path)).total_calls > 0
@@ -0,0 +1,131 @@
+'''Import-time budgets for each subcommand, measured with `-X importtime`.
+
+Each subcommand is actually run (against a temporary database with a cached
+class), so imports made lazily while it runs are accounted for. Budgets are
+relative to the CLI startup cost measured in the same run, to keep them stable
+across machines.
+'''
+from datetime import date, datetime, time
+from pathlib import Path
+from time import sleep
+from typing import List, Set, Tuple
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from attor.blocks import AttendanceBlock, Schedule, TimeBlock, Weekday
+from attor.db import Class, Database
+
+ROOT = Path(__file__).parent.parent
+SHEET = ROOT / 'tests/assets/Presenças/Minicursos/0930/Matutino.xlsx'
+
+# Import time of each subcommand beyond startup, relative to startup. Those
+# reading XLSX files (openpyxl) measured about 0.8.
+BUDGETS = {
+    'add_block': 0.5,
+    'import_attendances': 1.25,
+    'validate': 0.5,
+    'watch': 1.25,
+    'query': 0.5,
+}
+
+FORBIDDEN = {
+    'add_block': {'cagrex', 'openpyxl', 'getpass', 'attor.report'},
+    'import_attendances': {'cagrex', 'getpass', 'attor.report'},
+    # Class is cached, so CAGR is never reached.
+    'validate': {'cagrex', 'openpyxl', 'getpass'},
+    'watch': {'cagrex', 'getpass'},
+    'query': {'cagrex', 'openpyxl', 'getpass'},
+}
+
+
+def make_db(path: Path) -> Path:
+    block = TimeBlock('Matutino', date(2019, 9, 30), time(10, 10),
+                      time(12, 0))
+    Database(
+        path=path,
+        blocks=[block],
+        attendances=[AttendanceBlock(
+            block, {'1'}, checkins={'1': datetime(2019, 9, 30, 10, 5)},
+        )],
+        classes=[Class(
+            subject_id='INE5401',
+            class_id='01208A',
+            semester='20192',
+            students=['1'],
+            schedule=[Schedule(Weekday.MONDAY, time(10, 10), 2)],
+        )],
+        students={'1': 'Student'},
+    ).save()
+    return path
+
+
+def subcommand_args(subcommand: str, tmp: Path) -> List[str]:
+    db = ['--db', str(make_db(tmp / 'attor.db'))]
+    return {
+        'add_block': ['add_block', 'X', '2019-10-01', '10:00', '12:00', *db],
+        'import_attendances': ['import_attendances', str(SHEET), *db],
+        'validate': [
+            'validate', 'INE5401', '01208A', '20192', str(tmp / 'out'), *db
+        ],
+        'watch': ['watch', str(tmp), str(tmp / 'out'), *db],
+        'query': ['query', '1', *db],
+    }[subcommand]
+
+
+def run_importtime(args: List[str], interrupt: bool = False) -> str:
+    '''Runs attor with given args, returning `-X importtime` output. If
+    `interrupt`, sends it a SIGINT shortly after it printed its first line.'''
+    cmd = [sys.executable, '-u', '-X', 'importtime', '-m', 'attor', *args]
+    if not interrupt:
+        return subprocess.run(
+            cmd, cwd=ROOT, capture_output=True, check=True, text=True,
+        ).stderr
+
+    proc = subprocess.Popen(
+        cmd,
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    assert proc.stdout is not None
+    proc.stdout.readline()
+    # Leaves it time to enter the loop that handles Ctrl-C.
+    sleep(0.5)
+    proc.send_signal(signal.SIGINT)
+    _, stderr = proc.communicate(timeout=30)
+    assert proc.returncode == 0
+    return stderr
+
+
+def import_times(stderr: str) -> Tuple[Set[str], int]:
+    '''Returns every module imported and the total import time (us).'''
+    modules = set()
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        modules.add(name.strip())
+        # Only top-level imports, as nested ones are in their cumulative.
+        if not name.startswith('  '):
+            total += int(cumulative)
+    return modules, total
+
+
+@pytest.mark.parametrize('subcommand', BUDGETS.keys())
+def test_subcommand_imports(subcommand, tmpdir):
+    _, startup = import_times(run_importtime(['--help']))
+
+    args = subcommand_args(subcommand, Path(str(tmpdir)))
+    modules, total = import_times(
+        run_importtime(args, interrupt=subcommand == 'watch')
+    )
+
+    assert not FORBIDDEN[subcommand] & modules
+    assert total - startup <= BUDGETS[subcommand] * startup